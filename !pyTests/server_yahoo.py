@@ -1,8 +1,26 @@
 import asyncio
+import functools
+import inspect
 import websockets
 import json
-import time
-from collections import deque, defaultdict
+import re
+import sys
+from collections import Counter, deque
+
+# Fastest available JSON decoder; orjson also accepts bytes frames directly
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    try:
+        from ujson import loads as json_loads
+    except ImportError:
+        from json import loads as json_loads
+
+# libuv-based event loop where available (not on Windows)
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 
 URL = "wss://ckir.ddns.net:9002/ws"
 SYMBOLS = [
@@ -17,50 +35,190 @@ SYMBOLS = [
     "REGN", "ROP", "ROST", "SBUX", "SHOP", "SNPS", "STX", "TEAM", "TMUS", "TRI",
     "TSLA", "TTWO", "TXN", "VRSK", "VRTX", "WBD", "WDAY", "WDC", "WMT", "XEL", "ZS",
 ]
+# Maps an incoming symbol to the shared key string, so a single lookup checks
+# membership and hands the counter a key that matches by identity
+SYMBOL_KEYS = {s: s for s in SYMBOLS}
+
+# Bucket for pricing messages whose symbol is not in the subscription
+UNKNOWN = "UNKNOWN"
+
+# Bucket for frames dropped unparsed because the frame ring was full
+DROPPED = "DROPPED"
+
+# Bucket for frames that are not valid JSON or not a JSON object
+MALFORMED = "MALFORMED"
+
+# Pulls message.id out of pricing frames without decoding them. Only the exact
+# {"type":"pricing","message":{"id":...} layout matches; any other goes to JSON.
+PRICING_RE = re.compile(rb'"type":"pricing","message":\{"id":"([^"]*)"')
+
+# Largest frame accepted from the server
+MAX_FRAME_SIZE = 2**20
 
-async def rate_printer(global_timestamps, symbol_timestamps):
+# Frames buffered between the reader and the parser before the oldest is dropped
+RING_SIZE = 1024
+
+# Frames parsed in a row before the worker yields so the reader can run
+YIELD_EVERY = 64
+
+# Most active symbols listed in each summary
+TOP_N = 20
+
+# Zero count for every subscribed symbol plus the unknown, dropped and malformed
+# buckets. These are the only keys the per-symbol counter ever holds.
+ZERO_COUNTS = dict.fromkeys(SYMBOLS + [UNKNOWN, DROPPED, MALFORMED], 0)
+
+def reset_counts(symbol_counter):
+    """Zeroes the per-symbol bucket in place."""
+    # dict.update overwrites the counts; Counter.update would add to them
+    dict.update(symbol_counter, ZERO_COUNTS)
+
+async def rate_printer(symbol_counter):
     """Calculates and prints rates once per minute."""
+    loop = asyncio.get_running_loop()
+    # Wake at absolute deadlines so report time does not accumulate as drift
+    deadline = loop.time()
     try:
         while True:
-            await asyncio.sleep(60)
-            now = time.time()
-            one_minute_ago = now - 60
-
-            # Clean global timestamps
-            while global_timestamps and global_timestamps[0] < one_minute_ago:
-                global_timestamps.popleft()
-
-            # Clean per-symbol timestamps and build current rate map
-            per_symbol_rates = {}
-            for symbol, dq in symbol_timestamps.items():
-                while dq and dq[0] < one_minute_ago:
-                    dq.popleft()
-                if len(dq) > 0:
-                    per_symbol_rates[symbol] = len(dq)
-
-            # Sort by msg/min descending
-            sorted_rates = sorted(per_symbol_rates.items(), key=lambda x: x[1], reverse=True)
-            
+            deadline += 60
+            await asyncio.sleep(max(0, deadline - loop.time()))
+
+            # Take this minute's per-symbol counts and start a fresh bucket.
+            # No await in between, so the receive loop cannot interleave.
+            snapshot = symbol_counter.copy()
+            reset_counts(symbol_counter)
+            dropped_rate = snapshot.pop(DROPPED)
+            malformed_rate = snapshot.pop(MALFORMED)
+            global_rate = sum(snapshot.values())
+            unknown_rate = snapshot.pop(UNKNOWN)
+
+            # Top symbols by msg/min, skipping symbols without messages.
+            # most_common(n) selects with heapq.nlargest instead of a full sort.
+            active = +snapshot
+            top_rates = active.most_common(TOP_N)
+
             # Format as comma-separated string
-            report = ", ".join([f"{symbol}: {rate} msg/min" for symbol, rate in sorted_rates])
+            report = ", ".join([f"{symbol}: {rate} msg/min" for symbol, rate in top_rates])
+            if len(active) > TOP_N:
+                report += f" (+{len(active) - TOP_N} more)"
 
-            print("\n" + "="*30)
-            print("----- 1‑Minute Summary -----")
-            print(f"Global rate: {len(global_timestamps)} msg/min")
-            print(f"Symbols: {report if report else 'No data yet'}")
-            print("="*30 + "\n")
+            # Emit the whole summary with a single write
+            lines = [
+                "",
+                "="*30,
+                "----- 1‑Minute Summary -----",
+                f"Global rate: {global_rate} msg/min",
+                f"Symbols: {report if report else 'No data yet'}",
+            ]
+            if unknown_rate:
+                lines.append(f"Unknown symbols: {unknown_rate} msg/min")
+            if dropped_rate:
+                lines.append(f"Dropped frames: {dropped_rate} msg/min (not in rates above)")
+            if malformed_rate:
+                lines.append(f"Malformed frames: {malformed_rate} msg/min (not in rates above)")
+            lines += ["="*30, "", ""]
+            sys.stdout.write("\n".join(lines))
+            sys.stdout.flush()
 
     except asyncio.CancelledError:
         # Expected on shutdown
         pass
 
+async def frame_reader(ws, ring, ready, symbol_counter):
+    """Receives frames as fast as possible; the bounded ring drops the oldest on overflow."""
+    append = ring.append
+    notify = ready.set
+    # decode=False hands text frames over as bytes, skipping UTF-8 decoding.
+    # Only the websockets >= 14 client accepts it; older ones return str.
+    recv = ws.recv
+    if "decode" in inspect.signature(recv).parameters:
+        recv = functools.partial(recv, decode=False)
+    while True:
+        try:
+            raw = await recv()
+        except websockets.ConnectionClosedOK:
+            return
+        if isinstance(raw, str):
+            raw = raw.encode()
+        if len(ring) == RING_SIZE:
+            # Appending evicts the oldest unparsed frame; record the loss
+            symbol_counter[DROPPED] += 1
+        append(raw)
+        notify()
+
+async def frame_worker(ring, ready, symbol_counter):
+    """Parses queued frames and updates the rate counters."""
+    # Bind hot-path lookups to locals once
+    _loads = json_loads
+    _get = dict.get
+    _search = PRICING_RE.search
+    symbol_keys = SYMBOL_KEYS
+    popleft = ring.popleft
+    _sleep = asyncio.sleep
+
+    while True:
+        # Sleep until the reader has queued frames, then drain them all
+        await ready.wait()
+        ready.clear()
+
+        batch = 0
+        while ring:
+            # Parsing runs on the event loop thread; let recv in between batches
+            batch += 1
+            if batch == YIELD_EVERY:
+                batch = 0
+                await _sleep(0)
+                if not ring:
+                    break
+
+            raw = popleft()
+
+            # Fast path: sniff the symbol straight from the frame bytes
+            symbol = None
+            m = _search(raw)
+            if m:
+                try:
+                    symbol = m[1].decode("ascii")
+                except UnicodeDecodeError:
+                    # Non-ASCII id; let the JSON slow path decode it
+                    pass
+
+            # Slow path: full decode for unexpected layouts and other messages
+            if symbol is None:
+                try:
+                    data = _loads(raw)
+                except ValueError:
+                    # Invalid JSON; orjson, ujson and json errors all subclass ValueError
+                    symbol_counter[MALFORMED] += 1
+                    continue
+                if not isinstance(data, dict):
+                    symbol_counter[MALFORMED] += 1
+                    continue
+                if _get(data, "type") != "pricing":
+                    # Print non-pricing messages (like system heartbeat)
+                    print(f"System Message: {data}")
+                    continue
+                message = _get(data, "message", {})
+                symbol = _get(message, "id") if isinstance(message, dict) else None
+                if not isinstance(symbol, str):
+                    symbol = UNKNOWN
+
+            # Never let unexpected symbols grow the counter
+            symbol_counter[symbol_keys.get(symbol, UNKNOWN)] += 1
+
 async def main():
-    global_timestamps = deque()
-    symbol_timestamps = defaultdict(deque)
-    reporter_task = None
+    symbol_counter = Counter()
+    reset_counts(symbol_counter)
+    ring = deque(maxlen=RING_SIZE)
+    ready = asyncio.Event()
+    tasks = []
 
     try:
-        async with websockets.connect(URL) as ws:
+        # max_queue=None leaves the library's receive buffer unbounded; the
+        # reader drains it into the bounded frame ring as fast as it can
+        async with websockets.connect(
+            URL, compression=None, max_size=MAX_FRAME_SIZE, max_queue=None
+        ) as ws:
             # Subscribe
             subscription_msg = {"subscribe": SYMBOLS}
             await ws.send(json.dumps(subscription_msg))
@@ -68,39 +226,44 @@ async def main():
             print("Running... Press Ctrl+C to stop.")
 
             # Start background reporter
-            reporter_task = asyncio.create_task(rate_printer(global_timestamps, symbol_timestamps))
-
-            # Process incoming messages
-            async for raw in ws:
-                now = time.time()
-                data = json.loads(raw)
-
-                if data.get("type") == "pricing":
-                    message = data.get("message", {})
-                    symbol = message.get("id", "UNKNOWN")
-                    
-                    global_timestamps.append(now)
-                    symbol_timestamps[symbol].append(now)
-                else:
-                    # Print non-pricing messages (like system heartbeat)
-                    print(f"System Message: {data}")
+            tasks.append(asyncio.create_task(rate_printer(symbol_counter)))
+
+            # The reader buffers frames in the drop-oldest ring; the worker parses
+            # them, yielding every YIELD_EVERY frames so recv is not held off
+            # for a whole batch. Both share one thread, so parsing and reads
+            # take turns rather than overlap.
+            reader_task = asyncio.create_task(frame_reader(ws, ring, ready, symbol_counter))
+            worker_task = asyncio.create_task(frame_worker(ring, ready, symbol_counter))
+            tasks += [reader_task, worker_task]
+
+            # Run until the connection closes or either side fails
+            done, _ = await asyncio.wait(
+                (reader_task, worker_task), return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                task.result()
 
     except (KeyboardInterrupt, asyncio.CancelledError):
         print("\nShutdown signal received...")
     except Exception as e:
         print(f"\nUnexpected Error: {e}")
     finally:
-        if reporter_task:
-            reporter_task.cancel()
-            try:
-                await reporter_task
-            except asyncio.CancelledError:
-                pass
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
         print("Clean shutdown complete.")
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        if uvloop is None:
+            asyncio.run(main())
+        elif sys.version_info >= (3, 11):
+            with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+                runner.run(main())
+        else:
+            # asyncio.Runner is 3.11+; older interpreters use the event loop policy
+            uvloop.install()
+            asyncio.run(main())
     except KeyboardInterrupt:
         # Final safety catch for Windows terminal behavior
         pass
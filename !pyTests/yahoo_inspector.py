@@ -1,13 +1,21 @@
 import yfinance as yf
+import json
 import logging
+import os
 import websocket # Make sure to `pip install websocket-client`
 
-# Enable verbose logging for the websocket-client library
-# This will print the raw WebSocket frames being sent and received.
-websocket.enableTrace(True)
+# Frame tracing and debug logging are slow, so only enable them with YF_DEBUG=1
+DEBUG = os.getenv("YF_DEBUG") == "1"
 
-# Set up a basic logger to see yfinance's output as well
-logging.basicConfig(level=logging.DEBUG)
+if DEBUG:
+    # Enable verbose logging for the websocket-client library
+    # This will print the raw WebSocket frames being sent and received.
+    websocket.enableTrace(True)
+
+    # Set up a basic logger to see yfinance's output as well
+    logging.basicConfig(level=logging.DEBUG)
+else:
+    logging.basicConfig(level=logging.WARNING)
 
 def on_message(ws, message):
     """Callback function to handle incoming messages."""
@@ -34,8 +42,8 @@ def on_open(ws):
     tickers = ["AAPL", "GOOG", "TSLA"]
     print(f"Subscribing to: {tickers}")
     # The yfinance library handles the subscription format internally.
-    # By tracing the websocket traffic, we can see what it sends.
-    ws.send(str({"subscribe": tickers})) # This mimics how yfinance sends the message
+    # Run with YF_DEBUG=1 to trace the frames sent and received.
+    ws.send(json.dumps({"subscribe": tickers})) # Subscription is sent as a JSON object
     print("------------------------")
 
 if __name__ == "__main__":
@@ -52,4 +60,4 @@ if __name__ == "__main__":
                               on_close=on_close)
 
     # Run the WebSocket client
-    ws.run_forever()
+    ws.run_forever(skip_utf8_validation=True)